@@ -1,22 +1,96 @@
-# Ensure eventlet monkey-patching happens as early as possible when available.
-# Apply the patch via a small helper module so flake8 doesn't report
-# "module level import not at top of file" when monkey_patch runs.
+# Ensure gevent/eventlet monkey-patching happens as early as possible when
+# available. Apply the patch via a small helper module so flake8 doesn't
+# report "module level import not at top of file" when monkey_patch runs.
+import patch_async
+
+# isort: split
 import errno
-import glob
-import gzip
+import importlib
+import json
 import logging
 import os
-from typing import Any, Callable, Dict, List, Optional, Protocol, Union, cast
+import queue
+import socket
+import stat
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Protocol,
+    Set,
+    Tuple,
+    TypeVar,
+    Union,
+    cast,
+)
 
 import click
-from flask import Flask, render_template
-from flask_socketio import SocketIO
-from watchdog.events import FileSystemEvent, FileSystemEventHandler
-
-import patch_eventlet  # noqa: F401
+from flask import (
+    Flask,
+    Response,
+    abort,
+    render_template,
+    request,
+    send_from_directory,
+)
+from flask_socketio import SocketIO, join_room, leave_room, rooms
+from watchdog.events import (
+    FileClosedEvent,
+    FileCreatedEvent,
+    FileDeletedEvent,
+    FileModifiedEvent,
+    FileMovedEvent,
+    FileSystemEvent,
+    FileSystemEventHandler,
+)
+from watchdog.observers import Observer
+from watchdog.observers.api import BaseObserver
 
 # Type alias to keep signatures shorter and within line-length limits
 SkipSid = Optional[Union[str, List[str]]]
+_T = TypeVar("_T")
+
+
+def _optional_import(name: str) -> Any:
+    """Import an optional accelerator module, or return None if missing."""
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        return None
+
+
+_indexed_gzip = _optional_import("indexed_gzip")
+_rapidgzip = _optional_import("rapidgzip")
+# isal's zlib API is a drop-in for zlib's, with a much faster inflate
+_inflate: Any = _optional_import("isal.isal_zlib") or zlib
+_orjson = _optional_import("orjson")
+
+
+class _OrjsonJSON:
+    """json-module stand-in for Socket.IO packets, backed by orjson.
+
+    Payloads orjson rejects (e.g. lone surrogates) go through the stdlib
+    encoder so emits behave as they did before.
+    """
+
+    @staticmethod
+    def dumps(obj: Any, **kwargs: Any) -> str:
+        try:
+            return cast(str, _orjson.dumps(obj).decode())
+        except TypeError:
+            return json.dumps(obj, **kwargs)
+
+    @staticmethod
+    def loads(data: Union[str, bytes], **kwargs: Any) -> Any:
+        return _orjson.loads(data)
+
 
 app = Flask(__name__)
 app.config["SECRET_KEY"] = os.environ.get("SECRET_KEY", "secret!")
@@ -28,6 +102,10 @@ logger = logging.getLogger(__name__)
 
 # Create a small typed wrapper delegating to the real Flask-SocketIO
 class SocketIOLike(Protocol):
+    async_mode: str
+    server: Any
+    sockio_mw: Any
+
     def emit(
         self,
         event: str,
@@ -63,7 +141,13 @@ class SocketIOLike(Protocol):
 
 
 _raw_socketio: SocketIOLike = cast(
-    SocketIOLike, SocketIO(app, cors_allowed_origins="*")
+    SocketIOLike,
+    SocketIO(
+        app,
+        async_mode=patch_async.ASYNC_MODE,
+        cors_allowed_origins="*",
+        json=_OrjsonJSON if _orjson is not None else None,
+    ),
 )
 
 
@@ -137,6 +221,20 @@ class SocketIOWrapper:
 
 socketio: SocketIOWrapper = SocketIOWrapper(_raw_socketio)
 
+# Native threads for whole-file reads and (de)compression; zlib releases
+# the GIL, so these run alongside the event loop instead of stalling it.
+_read_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="reader")
+
+
+def run_in_reader(func: Callable[..., _T], *args: Any) -> _T:
+    """Run *func* on the reader pool, yielding to the event loop until
+    it finishes, and return its result."""
+    future = _read_pool.submit(func, *args)
+    while not future.done():
+        socketio.sleep(0.01)
+    return future.result()
+
+
 # Log a message that the playbook's wait_for task can detect
 logger.info("Starting server on 127.0.0.1 (via gunicorn/eventlet)")
 
@@ -144,22 +242,158 @@ logger.info("Starting server on 127.0.0.1 (via gunicorn/eventlet)")
 LOGS_DIRECTORY = os.environ.get("ANSIBLE_LOGS_DIR", "/var/log/ansible")
 INITIAL_PORT = int(os.environ.get("INITIAL_PORT", "5000"))
 MAX_PORT_TRIES = int(os.environ.get("MAX_PORT_TRIES", "20"))
+# File name suffixes shown in the UI (plain logs and rotated archives)
+_LOG_EXTS = (".log", ".gz")
+# Coalesce updates of a file into one emit per window, unless this many
+# appended bytes are already waiting to be sent.
+EMIT_DEBOUNCE = float(os.environ.get("EMIT_DEBOUNCE", "0.2"))
+EMIT_MAX_PENDING_BYTES = 64 * 1024
+# Upper bound on file text (appends and re-sends) held between drains
+EMIT_MAX_QUEUED_BYTES = 16 * 1024 * 1024
+# get_file_tail defaults and where seek indexes for .gz archives are kept
+TAIL_BYTES = 64 * 1024
+GZ_INDEX_DIR = os.environ.get("GZ_INDEX_DIR", "/var/cache/ansible-ws-logging")
+# Archives at least this large are inflated by rapidgzip on all cores
+PARALLEL_GUNZIP_MIN_SIZE = 32 * 1024 * 1024
+# Compressed bytes fed to zlib per step when streaming an archive
+READ_BUFFER_SIZE = 128 * 1024
+
+
+# Key of a queued emit: (event, room or None for everyone, file name)
+_EmitKey = Tuple[str, Optional[str], Optional[str]]
+# Events carrying file text, and the payload field holding it
+_CONTENT_FIELDS = {"file_content": "content", "file_content_append": "append"}
+
+
+def _content_len(event: str, payload: Any) -> int:
+    field = _CONTENT_FIELDS.get(event)
+    return len(payload[field]) if field is not None else 0
+
+
+class EmitQueue:
+    """Buffer for the monitor's broadcasts, coalesced per file.
+
+    Only file text counts against *max_bytes*: content that would go over
+    it is dropped and its viewers are sent ``backpressure`` instead.
+    Notices and listings are never dropped.
+    """
+
+    def __init__(self, max_bytes: int = EMIT_MAX_QUEUED_BYTES) -> None:
+        self.max_bytes = max_bytes
+        self.queued_bytes = 0
+        self._pending: Dict[_EmitKey, Dict[str, Any]] = {}
+        self._dropped: Set[str] = set()
+
+    def _discard(self, key: _EmitKey) -> None:
+        payload = self._pending.pop(key, None)
+        if payload is not None:
+            self.queued_bytes -= _content_len(key[0], payload)
+
+    def put(self, event: str, payload: Any, to: Optional[str] = None) -> None:
+        name = payload.get("name") if isinstance(payload, dict) else None
+        key: _EmitKey = (event, to, name)
+        size = _content_len(event, payload)
+        if event in _CONTENT_FIELDS and name is not None:
+            if name in self._dropped:
+                return  # viewers reload it anyway
+            if event == "file_content":
+                self._discard(("file_content_append", to, name))
+                self._discard(key)
+            if self.queued_bytes + size > self.max_bytes:
+                self._discard(("file_content_append", to, name))
+                self._dropped.add(name)
+                return
+        queued = self._pending.get(key)
+        if queued is not None and event == "file_content_append":
+            # Appends of one file are contiguous: keep the first offset
+            queued["append"] += payload["append"]
+            if "end" in payload:
+                queued["end"] = payload["end"]
+            self.queued_bytes += size
+            return
+        # Re-insert so the entry is sent after anything queued before it
+        self._discard(key)
+        self._pending[key] = (
+            dict(payload) if event == "file_content_append" else payload
+        )
+        self.queued_bytes += size
+
+    def drain(self) -> None:
+        """Emit everything queued, oldest first.
+
+        Entries are taken off one at a time, so if an emit raises, the
+        ones behind it stay queued for the next drain.
+        """
+        pending = self._pending
+        while pending:
+            key = next(iter(pending))
+            payload = pending[key]
+            self._discard(key)
+            event, to, _ = key
+            socketio.emit(event, payload, to=to)
+        while self._dropped:
+            name = self._dropped.pop()
+            socketio.emit("backpressure", {"name": name}, to=_log_room(name))
+
+
+emit_queue = EmitQueue()
+
+# Event paths that are not str, by exact type
+_PATH_DECODERS: Dict[type, Callable[[Any], str]] = {
+    bytes: bytes.decode,
+    bytearray: bytearray.decode,
+    memoryview: lambda view: view.tobytes().decode(),
+}
 
 
 class LogFileHandler(FileSystemEventHandler):
+    def __init__(self) -> None:
+        super().__init__()
+        # Bytes of each .log file already streamed to clients, and the
+        # inode they were read from (a new inode means a rotated file)
+        self.offsets: Dict[str, int] = {}
+        self.inodes: Dict[str, int] = {}
+        # Latest stat of files whose update is held back by the debounce
+        self._pending: Dict[str, os.stat_result] = {}
+        self._last_emit: Dict[str, float] = {}
+        # Set by create/delete/move events; the listing goes out once per
+        # flush_pending() however many files a rotation touched
+        self._list_dirty = False
+
+    def track(self, filepath: str, st: os.stat_result) -> None:
+        """Treat *filepath* as streamed up to its current size."""
+        self.offsets[filepath] = st.st_size
+        self.inodes[filepath] = st.st_ino
+
+    def _forget(self, filepath: str) -> None:
+        self.offsets.pop(filepath, None)
+        self.inodes.pop(filepath, None)
+        self._pending.pop(filepath, None)
+        self._last_emit.pop(filepath, None)
+
     def _src_path_to_str(self, src_path: Any) -> str:
-        if isinstance(src_path, (bytes, bytearray)):
-            return src_path.decode()
-        if isinstance(src_path, memoryview):
-            return src_path.tobytes().decode()
-        return src_path if isinstance(src_path, str) else str(src_path)
+        # watchdog hands out str paths on Python 3; check that first.
+        if type(src_path) is str:
+            return src_path
+        decode = _PATH_DECODERS.get(type(src_path))
+        return decode(src_path) if decode is not None else str(src_path)
 
     def on_created(self, event: FileSystemEvent) -> None:
         if event.is_directory:
             return
         src = self._src_path_to_str(event.src_path)
-        if src.endswith((".log", ".gz")):
-            self.emit_log_files()
+        if src.endswith(_LOG_EXTS):
+            self._list_dirty = True
+            # Archives are written in place; on_closed sends them whole
+            if src.endswith(".log"):
+                self._resend(src)
+
+    def on_closed(self, event: FileSystemEvent) -> None:
+        if event.is_directory:
+            return
+        src = self._src_path_to_str(event.src_path)
+        if src.endswith(".gz"):
+            self._resend(src)
 
     def on_modified(self, event: FileSystemEvent) -> None:
         if event.is_directory:
@@ -167,73 +401,483 @@ class LogFileHandler(FileSystemEventHandler):
         src_path_str = self._src_path_to_str(event.src_path)
         if not src_path_str.endswith(".log"):
             return
-        filename: str = os.path.basename(src_path_str)
-        content: str = read_file_content(src_path_str)
-        socketio.emit("file_content", {"name": filename, "content": content})
+        try:
+            self.queue_file_update(src_path_str, os.stat(src_path_str))
+        except OSError:
+            self._forget(src_path_str)
 
     def on_deleted(self, event: FileSystemEvent) -> None:
         if event.is_directory:
             return
         src = self._src_path_to_str(event.src_path)
-        if src.endswith(".log") or src.endswith(".gz"):
-            self.emit_log_files()
+        if src.endswith(_LOG_EXTS):
+            self._forget(src)
+            self._list_dirty = True
+
+    def on_moved(self, event: FileSystemEvent) -> None:
+        if event.is_directory:
+            return
+        src = self._src_path_to_str(event.src_path)
+        dest = self._src_path_to_str(event.dest_path)
+        if not (src.endswith(_LOG_EXTS) or dest.endswith(_LOG_EXTS)):
+            return
+        self._forget(src)
+        if dest.endswith(_LOG_EXTS):
+            # Whatever viewers of dest hold belongs to the file it replaced
+            self._resend(dest)
+        self._list_dirty = True
+
+    def _resend(self, filepath: str) -> None:
+        """Send a created or replaced log in full on its next update."""
+        self._forget(filepath)
+        try:
+            st = os.stat(filepath)
+        except OSError:
+            return  # already gone again
+        self.queue_file_update(filepath, st)
 
     def emit_log_files(self) -> None:
+        # Only called on a known change, which a coarse directory mtime
+        # may not show yet, so never serve the cached listing here
+        _listing_cache["dir"] = None
         log_files: List[Dict[str, str]] = get_log_files()
-        socketio.emit("file_list", log_files)
+        emit_queue.put("file_list", log_files)
+
+    def queue_file_update(self, filepath: str, st: os.stat_result) -> None:
+        """Emit an update for *filepath* now or hold it for flush_pending().
+
+        The first change after a quiet period goes out immediately; later
+        ones within EMIT_DEBOUNCE are folded into a single emit, which the
+        byte offsets make a concatenation of everything appended.
+        """
+        self._pending[filepath] = st
+        backlog = st.st_size - self.offsets.get(filepath, 0)
+        last = self._last_emit.get(filepath, 0.0)
+        now = time.monotonic()
+        if now - last >= EMIT_DEBOUNCE or backlog >= EMIT_MAX_PENDING_BYTES:
+            self._flush(filepath, now)
+
+    def flush_pending(self) -> None:
+        """Emit held-back updates whose debounce window has elapsed."""
+        if self._list_dirty:
+            self._list_dirty = False
+            self.emit_log_files()
+        now = time.monotonic()
+        for filepath in list(self._pending):
+            if now - self._last_emit.get(filepath, 0.0) >= EMIT_DEBOUNCE:
+                self._flush(filepath, now)
+
+    def _flush(self, filepath: str, now: float) -> None:
+        st = self._pending.pop(filepath)
+        self._last_emit[filepath] = now
+        try:
+            self.emit_file_update(filepath, st)
+        except OSError:
+            self._forget(filepath)
+
+    def emit_file_update(self, filepath: str, st: os.stat_result) -> None:
+        """Queue what changed in *filepath* since the last call for its
+        viewers, and a ``file_updated`` notice for everyone."""
+        filename: str = os.path.basename(filepath)
+        room = _log_room(filename)
+        offset = self.offsets.get(filepath, 0)
+        # An unknown inode is a file created or rotated in since priming
+        replaced = self.inodes.get(filepath) != st.st_ino
+        if filepath.endswith(".gz") and not _has_viewers(filename):
+            # Nobody to inflate a rotated-in archive for
+            self.track(filepath, st)
+        elif filepath.endswith(".gz") or replaced or st.st_size < offset:
+            content, size = run_in_reader(read_file_snapshot, filepath)
+            self.offsets[filepath] = st.st_size if size is None else size
+            self.inodes[filepath] = st.st_ino
+            emit_queue.put(
+                "file_content",
+                {"name": filename, "content": content, "size": size},
+                to=room,
+            )
+        elif st.st_size > offset:
+            length = st.st_size - offset
+            args = (filepath, offset, length)
+            if length > EMIT_MAX_PENDING_BYTES:
+                # A backlog this big would stall the hub while it is read
+                # and decoded
+                text, used = run_in_reader(read_file_append, *args)
+            else:
+                text, used = read_file_append(*args)
+            if not used:
+                return  # only an incomplete UTF-8 sequence so far
+            self.offsets[filepath] = offset + used
+            self.inodes[filepath] = st.st_ino
+            emit_queue.put(
+                "file_content_append",
+                {
+                    "name": filename,
+                    "offset": offset,
+                    "end": offset + used,
+                    "append": text,
+                },
+                to=room,
+            )
+        else:
+            return
+        emit_queue.put("file_updated", {"name": filename})
+
+
+def _utf8_complete_len(raw: bytes) -> int:
+    """Length of the longest prefix of *raw* that does not end inside a
+    multi-byte UTF-8 sequence."""
+    n = len(raw)
+    for i in range(n - 1, max(n - 4, 0) - 1, -1):
+        byte = raw[i]
+        if byte < 0x80:
+            return n
+        if byte >= 0xC0:  # lead byte: is its whole sequence present?
+            need = 2 if byte < 0xE0 else 3 if byte < 0xF0 else 4
+            return i if n - i < need else n
+    return n
+
+
+def read_file_snapshot(filepath: str) -> Tuple[str, Optional[int]]:
+    """Return a log's content and the number of file bytes it covers.
+
+    The size lets clients line ``file_content_append`` offsets up with
+    what they hold; it is None for archives and on errors.
+    """
+    if filepath.endswith(".gz"):
+        return read_file_content(filepath), None
+    try:
+        with open(filepath, "rb", buffering=0) as file:
+            raw: bytes = file.readall()
+    except Exception as e:
+        return f"Error reading file: {e}", None
+    size = _utf8_complete_len(raw)
+    return raw[:size].decode("utf-8", errors="replace"), size
+
+
+def read_file_append(path: str, offset: int, length: int) -> Tuple[str, int]:
+    """Decode up to *length* bytes appended at *offset*.
+
+    Returns the text and how many bytes it used; a trailing incomplete
+    UTF-8 sequence is left for the next call.
+    """
+    raw = read_file_delta(path, offset, length)
+    used = _utf8_complete_len(raw)
+    return raw[:used].decode("utf-8", errors="replace"), used
 
 
 def read_file_content(filepath: str) -> str:
     try:
         if filepath.endswith(".gz"):
-            with gzip.open(filepath, "rb") as file:
-                raw: bytes = file.read()
-                return raw.decode("utf-8", errors="replace")
+            return fast_gunzip(filepath).decode("utf-8", errors="replace")
         else:
-            with open(
-                filepath,
-                "r",
-                encoding="utf-8",
-                errors="replace",
-            ) as file:
-                return file.read()
+            # One unbuffered read and one decode, without TextIOWrapper
+            with open(filepath, "rb", buffering=0) as file:
+                raw: bytes = file.readall()
+            return raw.decode("utf-8", errors="replace")
     except Exception as e:
         return f"Error reading file: {e}"
 
 
+def fast_gunzip(filepath: str) -> bytes:
+    """Inflate a whole .gz file in one shot instead of via GzipFile.
+
+    Each gzip member is inflated with a single zlib call; concatenated
+    members (``cat a.gz b.gz``) are handled like ``gzip.open`` does.
+    Large archives go to rapidgzip first when it is installed and there
+    are cores to spread over; anything it fails on (truncated or padded
+    archives) is decoded here instead.
+    """
+    threads = os.cpu_count() or 1
+    threshold = PARALLEL_GUNZIP_MIN_SIZE
+    if (
+        _rapidgzip is not None
+        and threads >= 2
+        and os.path.getsize(filepath) >= threshold
+    ):
+        try:
+            return _parallel_gunzip(filepath, threads)
+        except Exception as e:
+            logger.debug("rapidgzip failed on %s: %s", filepath, e)
+
+    # Not mmap: a file truncated while mapped (rotation) raises SIGBUS
+    with open(filepath, "rb", buffering=0) as file:
+        raw: bytes = file.readall()
+    chunks: List[bytes] = []
+    while raw:
+        decompressor = _inflate.decompressobj(wbits=zlib.MAX_WBITS | 16)
+        chunks.append(decompressor.decompress(raw))
+        if not decompressor.eof:
+            break  # truncated archive: keep what could be decoded
+        # Members may be followed by zero padding, as gzip.open accepts
+        raw = decompressor.unused_data.lstrip(b"\x00")
+    # A single member (the usual case) is returned by join without a copy
+    return b"".join(chunks)
+
+
+def _iter_gz(filepath: str) -> Iterator[bytes]:
+    """Yield the inflated content of a .gz file piece by piece.
+
+    Reads READ_BUFFER_SIZE compressed bytes at a time, so memory stays
+    bounded however large the archive is. Members are handled as in
+    fast_gunzip.
+    """
+    wbits = zlib.MAX_WBITS | 16
+    decompressor = _inflate.decompressobj(wbits=wbits)
+    started = False  # has the current member seen any input yet?
+    with open(filepath, "rb", buffering=0) as file:
+        while True:
+            raw: bytes = file.read(READ_BUFFER_SIZE)
+            if not raw:
+                return  # end of file; a truncated member just stops here
+            while raw:
+                if not started:
+                    # Members may be preceded by zero padding
+                    raw = raw.lstrip(b"\x00")
+                    if not raw:
+                        break
+                    started = True
+                chunk = decompressor.decompress(raw)
+                if chunk:
+                    yield chunk
+                if not decompressor.eof:
+                    break  # needs more input
+                raw = decompressor.unused_data
+                decompressor = _inflate.decompressobj(wbits=wbits)
+                started = False
+
+
+def _parallel_gunzip(filepath: str, threads: int) -> bytes:
+    """Inflate *filepath* with rapidgzip's multi-threaded block decoder.
+
+    rapidgzip runs its own thread pool (outside the GIL) and caches the
+    block index it discovers, so no executor is needed here. *threads*
+    must be at least 2: with one, rapidgzip aborts the whole process on
+    a truncated archive instead of raising.
+    """
+    with _rapidgzip.open(filepath, parallelization=threads) as file:
+        return cast(bytes, file.read())
+
+
+def read_file_tail(
+    filepath: str, nbytes: int = TAIL_BYTES
+) -> Tuple[str, Optional[int]]:
+    """Return the last *nbytes* of a log's (uncompressed) content and the
+    file offset it ends at, as read_file_snapshot does.
+
+    A plain tail starts and ends on whole UTF-8 characters.
+    """
+    try:
+        if filepath.endswith(".gz"):
+            return _read_gz_tail(filepath, nbytes), None
+        size = os.stat(filepath).st_size
+        start = max(0, size - nbytes)
+        raw: bytes = read_file_delta(filepath, start, size - start)
+    except Exception as e:
+        return f"Error reading file: {e}", None
+    if start:
+        # Skip the continuation bytes of a character cut off at the start
+        skip = 0
+        while skip < min(3, len(raw)) and 0x80 <= raw[skip] < 0xC0:
+            skip += 1
+        raw, start = raw[skip:], start + skip
+    used = _utf8_complete_len(raw)
+    return raw[:used].decode("utf-8", errors="replace"), start + used
+
+
+def _read_gz_tail(filepath: str, nbytes: int) -> str:
+    """Seek to the end of an archive through a persisted indexed_gzip
+    index; without the module, or with nowhere to keep the index, the
+    whole archive is streamed instead."""
+    if _indexed_gzip is None:
+        return _stream_gz_tail(filepath, nbytes)
+
+    index_path = os.path.join(GZ_INDEX_DIR, os.path.basename(filepath))
+    index_path += ".gzidx"
+    # Rotation renames archives onto reused names without touching their
+    # mtime, so an index only fits the exact file it was built from
+    st = os.stat(filepath)
+    stamp = [st.st_ino, st.st_size, st.st_mtime_ns]
+    stamp_path = index_path + ".stat"
+    try:
+        with open(stamp_path, encoding="utf-8") as file:
+            fresh = json.load(file) == stamp
+    except (OSError, ValueError):
+        fresh = False
+
+    if fresh:
+        try:
+            return _indexed_gz_tail(filepath, nbytes, index_path)
+        except Exception as e:  # e.g. ZRAN_IMPORT_INCONSISTENT
+            logger.info("Rebuilding gzip index %s: %s", index_path, e)
+            for path in (stamp_path, index_path):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    try:
+        os.makedirs(GZ_INDEX_DIR, exist_ok=True)
+        writable = os.access(GZ_INDEX_DIR, os.W_OK)
+    except OSError:
+        writable = False
+    if not writable:
+        # A full index build per request costs more than streaming
+        return _stream_gz_tail(filepath, nbytes)
+    return _indexed_gz_tail(filepath, nbytes, None, index_path, stamp)
+
+
+def _stream_gz_tail(filepath: str, nbytes: int) -> str:
+    """Decode a whole archive, keeping only the last *nbytes* of output."""
+    tail = bytearray()
+    for chunk in _iter_gz(filepath):
+        tail += chunk
+        if len(tail) > 2 * nbytes:
+            del tail[:-nbytes]
+    return bytes(tail[-nbytes:]).decode("utf-8", errors="replace")
+
+
+def _indexed_gz_tail(
+    filepath: str,
+    nbytes: int,
+    index_file: Optional[str],
+    save_to: Optional[str] = None,
+    stamp: Optional[List[int]] = None,
+) -> str:
+    """Read the tail through indexed_gzip, loading the index from
+    *index_file* or building it and saving it to *save_to* (with the
+    archive's *stamp* alongside)."""
+    with _indexed_gzip.IndexedGzipFile(
+        filename=filepath,
+        spacing=4 * 1024 * 1024,
+        drop_handles=False,
+        buffer_size=1 << 20,
+        index_file=index_file,
+    ) as igz:
+        if save_to is not None:
+            igz.build_full_index()
+            stamp_path = save_to + ".stat"
+            try:
+                # Written last, so a half-saved index never looks fresh
+                if os.path.exists(stamp_path):
+                    os.remove(stamp_path)
+                igz.export_index(save_to)
+                with open(stamp_path, "w", encoding="utf-8") as file:
+                    json.dump(stamp, file)
+            except OSError as e:
+                logger.warning("Cannot save gzip index %s: %s", save_to, e)
+        size = igz.seek(0, os.SEEK_END)
+        igz.seek(max(0, size - nbytes))
+        raw: bytes = igz.read()
+    return raw.decode("utf-8", errors="replace")
+
+
+def read_file_delta(filepath: str, offset: int, length: int) -> bytes:
+    """Read up to *length* bytes of *filepath* starting at *offset*."""
+    fd = os.open(filepath, os.O_RDONLY)
+    try:
+        return os.pread(fd, length, offset)
+    finally:
+        os.close(fd)
+
+
+class _QueuedEventHandler(FileSystemEventHandler):
+    """Hand watchdog events from the observer thread over to a queue."""
+
+    def __init__(self, events: "queue.Queue[FileSystemEvent]") -> None:
+        super().__init__()
+        self._events = events
+
+    def dispatch(self, event: FileSystemEvent) -> None:
+        self._events.put(event)
+
+
+def _start_observer(
+    handler: FileSystemEventHandler,
+) -> Optional[BaseObserver]:
+    """Start an inotify (or platform native) observer on LOGS_DIRECTORY."""
+    try:
+        observer = Observer()
+        observer.schedule(
+            handler,
+            LOGS_DIRECTORY,
+            recursive=False,
+            event_filter=[
+                FileClosedEvent,
+                FileCreatedEvent,
+                FileDeletedEvent,
+                FileModifiedEvent,
+                FileMovedEvent,
+            ],
+        )
+        observer.daemon = True
+        observer.start()
+    except Exception as e:  # e.g. inotify watch/instance limits reached
+        logger.warning("Native file watching unavailable: %s", e)
+        return None
+    return observer
+
+
 def monitor_logs() -> None:
-    """Pure Eventlet-compatible poller - NO watchdog, NO blocking FS ops."""
+    """Stream log changes to clients, woken by the kernel on real changes.
+
+    Watchdog's observer runs off the event loop and only queues events;
+    this green thread drains the queue and does the emits. Falls back to
+    poll_logs() when the observer cannot be started.
+    """
     if not os.path.exists(LOGS_DIRECTORY):
         logger.warning("Directory %s does not exist.", LOGS_DIRECTORY)
         return
 
-    poll_interval = 2.0  # Less aggressive polling
-    mtimes: Dict[str, float] = {}
+    drain_interval = 0.25
     event_handler = LogFileHandler()
+    # Clients fetch existing content themselves, so only bytes written
+    # from now on are streamed.
+    for entry in scan_log_dir():
+        event_handler.track(entry.path, entry.stat())
+
+    events: "queue.Queue[FileSystemEvent]" = queue.Queue()
+    observer = _start_observer(_QueuedEventHandler(events))
+    if observer is None:
+        poll_logs(event_handler)
+        return
 
-    def snapshot_files() -> List[str]:
-        """Non-blocking file list using os.listdir instead of glob."""
+    logger.info("monitor_logs started (%s)", type(observer).__name__)
+
+    while True:  # Let Gunicorn manage shutdown
         try:
-            return [
-                os.path.join(LOGS_DIRECTORY, f)
-                for f in os.listdir(LOGS_DIRECTORY)
-                if f.endswith((".log", ".gz"))
-            ]
-        except OSError:
-            return []
+            try:
+                while True:
+                    event_handler.dispatch(events.get_nowait())
+            except queue.Empty:
+                pass
+            event_handler.flush_pending()
+            emit_queue.drain()
+        except Exception as e:
+            logger.exception("Error in monitor_logs: %s", e)
+
+        socketio.sleep(drain_interval)  # Yields to the event loop
+
+
+def poll_logs(event_handler: LogFileHandler) -> None:
+    """Pure Eventlet-compatible poller - NO watchdog, NO blocking FS ops."""
+    poll_interval = 2.0  # Less aggressive polling
+    mtimes: Dict[str, float] = {}
+    offsets = event_handler.offsets
+
+    def snapshot_files() -> Dict[str, os.stat_result]:
+        """Non-blocking scan; DirEntry.stat() results are cached."""
+        return {entry.path: entry.stat() for entry in scan_log_dir()}
 
     # Initial snapshot (non-blocking)
-    for f in snapshot_files():
-        try:
-            mtimes[f] = os.path.getmtime(f)
-        except OSError:
-            pass
+    for f, st in snapshot_files().items():
+        mtimes[f] = st.st_mtime
+        event_handler.track(f, st)
 
     logger.info("monitor_logs started (pure Eventlet poller)")
 
     while True:  # Let Gunicorn manage shutdown
         try:
-            current_files = set(snapshot_files())
+            current_files = snapshot_files()
 
             # Detect new/removed files
             new_files = [f for f in current_files if f not in mtimes]
@@ -241,12 +885,15 @@ def monitor_logs() -> None:
 
             if new_files or removed_files:
                 for f in new_files:
-                    try:
-                        mtimes[f] = os.path.getmtime(f)
-                    except OSError:
-                        mtimes[f] = 0.0
+                    # Zero mtime and no inode: the loop below sends the
+                    # whole file once
+                    mtimes[f] = 0.0
+                    offsets.pop(f, None)
+                    event_handler.inodes.pop(f, None)
                 for f in removed_files:
                     mtimes.pop(f, None)
+                    offsets.pop(f, None)
+                    event_handler.inodes.pop(f, None)
                 event_handler.emit_log_files()
                 logger.debug(
                     "File list updated: +%d -%d",
@@ -255,26 +902,24 @@ def monitor_logs() -> None:
                 )
 
             # Detect modified files (most important)
-            for f in list(current_files):
-                try:
-                    mtime = os.path.getmtime(f)
-                    old_mtime = mtimes.get(f)
-                    if old_mtime is None or mtime > old_mtime:
-                        mtimes[f] = mtime
-                        filename = os.path.basename(f)
-                        content = read_file_content(f)
-                        socketio.emit(
-                            "file_content",
-                            {"name": filename, "content": content},
-                        )
-                        logger.debug("Emitted update for %s", filename)
-                except OSError:
-                    mtimes.pop(f, None)
+            # (a new inode is a file rotated in under the same name)
+            for f, st in current_files.items():
+                old_mtime = mtimes.get(f)
+                inode = event_handler.inodes.get(f)
+                if (
+                    old_mtime is None
+                    or st.st_mtime > old_mtime
+                    or (inode is not None and inode != st.st_ino)
+                ):
+                    mtimes[f] = st.st_mtime
+                    event_handler.queue_file_update(f, st)
+            event_handler.flush_pending()
+            emit_queue.drain()
 
         except Exception as e:
             logger.exception("Error in monitor_logs: %s", e)
 
-        socketio.sleep(poll_interval)  # Yields to Eventlet event loop
+        socketio.sleep(poll_interval)  # Yields to the event loop
 
 
 @app.route("/")
@@ -282,19 +927,140 @@ def index() -> Any:
     return render_template("index.html")
 
 
-def get_log_files() -> List[Dict[str, str]]:
-    if not os.path.exists(LOGS_DIRECTORY):
+def scan_log_dir() -> List["os.DirEntry[str]"]:
+    """Return the .log/.gz files of LOGS_DIRECTORY in one os.scandir pass.
+
+    The name filter and isfile check come from the directory entry
+    itself; the single stat each file needs is cached on the returned
+    entries, so callers can use ``entry.stat()`` freely. Dotfiles are
+    skipped like glob did.
+    """
+    found: List["os.DirEntry[str]"] = []
+    exts = _LOG_EXTS  # local lookup inside the per-entry loop
+    try:
+        with os.scandir(LOGS_DIRECTORY) as entries:
+            for entry in entries:
+                name = entry.name
+                if name.startswith(".") or not name.endswith(exts):
+                    continue
+                try:
+                    if entry.is_file():
+                        entry.stat()
+                        found.append(entry)
+                except OSError:
+                    continue
+    except OSError:
         return []
+    return found
+
+
+@app.route("/log/<name>")
+def download_log(name: str) -> Any:
+    """Serve a log file; Werkzeug streams it from disk (sendfile /
+    wsgi.file_wrapper) and handles conditional and Range requests.
+
+    Plain logs are gzipped on the fly for clients that accept it. Their
+    full responses carry X-Log-Size, the file bytes served, so the viewer
+    can line it up with the offsets of later appends."""
+    if not name.endswith(_LOG_EXTS):
+        abort(404)
+    if name.endswith(".gz"):
+        return send_from_directory(
+            LOGS_DIRECTORY, name, mimetype="application/gzip", conditional=True
+        )
+    if "gzip" in request.accept_encodings and request.range is None:
+        return _gzipped_log(name)
+    resp = send_from_directory(
+        LOGS_DIRECTORY, name, mimetype="text/plain", conditional=True
+    )
+    resp.vary.add("Accept-Encoding")
+    if resp.status_code == 200:
+        resp.headers["X-Log-Size"] = str(resp.content_length)
+    return resp
 
-    files: List[str] = []
-    for extension in ("*.log", "*.gz"):
-        files.extend(glob.glob(os.path.join(LOGS_DIRECTORY, extension)))
-    files.sort(key=os.path.getmtime, reverse=True)
 
-    log_files: List[Dict[str, str]] = []
-    for f in files:
-        if os.path.isfile(f):
-            log_files.append({"name": os.path.basename(f)})
+def _gzipped_log(name: str) -> Response:
+    """Stream a plain log with ``Content-Encoding: gzip``.
+
+    Validators come from the file's stat as send_from_directory's do, so
+    re-selecting an unchanged log is answered with 304.
+    """
+    filepath = _resolve_log_path(name)
+    if filepath is None:
+        abort(404)
+    try:
+        st = os.stat(filepath)
+    except OSError:
+        abort(404)
+    if not stat.S_ISREG(st.st_mode):
+        abort(404)
+    size = st.st_size
+    resp = Response(_iter_gzipped(filepath, size), mimetype="text/plain")
+    resp.headers["Content-Encoding"] = "gzip"
+    resp.headers["X-Log-Size"] = str(size)
+    resp.vary.add("Accept-Encoding")
+    # Differs from the identity response's tag, as the bytes do
+    resp.set_etag(f"{st.st_ino:x}-{st.st_mtime_ns:x}-{size:x}-gzip")
+    resp.last_modified = datetime.fromtimestamp(st.st_mtime, timezone.utc)
+    resp.make_conditional(request)
+    return resp
+
+
+def _iter_gzipped(filepath: str, size: int) -> Iterator[bytes]:
+    """Yield the first *size* bytes of *filepath* gzip compressed.
+
+    Level 1 costs little more than a copy and still shrinks text logs
+    several times over on the wire.
+    """
+    compressor = zlib.compressobj(1, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    with open(filepath, "rb", buffering=0) as file:
+        while size > 0:
+            raw = file.read(min(READ_BUFFER_SIZE, size))
+            if not raw:
+                break  # truncated meanwhile; X-Log-Size is an upper bound
+            size -= len(raw)
+            chunk = compressor.compress(raw)
+            if chunk:
+                yield chunk
+    yield compressor.flush()
+
+
+# Last get_log_files() result; reused while the directory mtime is
+# unchanged and the entry is younger than _LISTING_TTL seconds (file
+# mtimes drive the sort order but do not bump the directory mtime).
+# The monitor drops it before listing, as a change made within the same
+# timestamp tick leaves the directory mtime as it was.
+_LISTING_TTL = 1.0
+_listing_cache: Dict[str, Any] = {
+    "dir": None,
+    "mtime": 0,
+    "ts": 0.0,
+    "value": [],
+}
+
+
+def get_log_files() -> List[Dict[str, str]]:
+    try:
+        dir_mtime = os.stat(LOGS_DIRECTORY).st_mtime_ns
+    except OSError:
+        return []
+
+    now = time.monotonic()
+    cache = _listing_cache
+    if (
+        cache["dir"] == LOGS_DIRECTORY
+        and cache["mtime"] == dir_mtime
+        and now - cache["ts"] < _LISTING_TTL
+    ):
+        return cast(List[Dict[str, str]], cache["value"])
+
+    rows: List[Tuple[float, str]] = [
+        (entry.stat().st_mtime, entry.name) for entry in scan_log_dir()
+    ]
+    rows.sort(reverse=True)
+
+    log_files: List[Dict[str, str]] = [{"name": name} for _, name in rows]
+    cache.update(dir=LOGS_DIRECTORY, mtime=dir_mtime, ts=now, value=log_files)
     return log_files
 
 
@@ -313,24 +1079,163 @@ def handle_connect() -> None:
         _monitor_started = True
 
     log_files = get_log_files()
-    socketio.emit("file_list", log_files)
+    socketio.emit("file_list", log_files, to=_request_sid())
 
 
-@socketio.on("get_file_content")
-def handle_get_file_content(data: Dict[str, Any]) -> None:
+def _request_sid() -> str:
+    # Flask-SocketIO sets ``sid`` on the request inside event handlers
+    return cast(str, getattr(request, "sid"))
+
+
+def _log_room(filename: str) -> str:
+    """Room of the clients currently viewing *filename*."""
+    return f"log:{filename}"
+
+
+def _has_viewers(filename: str) -> bool:
+    """Whether a client of this process is in the log room of *filename*."""
+    manager = _raw_socketio.server.manager
+    viewers = manager.get_participants("/", _log_room(filename))
+    return next(viewers, None) is not None
+
+
+def _subscribe(filename: str) -> None:
+    """Move the requesting client into the log room of *filename*."""
+    room = _log_room(filename)
+    for current in rooms():
+        if current.startswith("log:") and current != room:
+            leave_room(current)
+    join_room(room)
+
+
+def _resolve_log_path(filename: str) -> Optional[str]:
+    """Map a client supplied name to a path inside LOGS_DIRECTORY."""
+    # Log files live directly in LOGS_DIRECTORY, so anything other than a
+    # bare file name is rejected without touching the filesystem. A bare
+    # name joined onto the directory cannot land outside it, which also
+    # rules out sibling directories such as /var/log/ansiblefoo.
+    if (
+        filename in ("", ".", "..")
+        or os.sep in filename
+        or (os.altsep and os.altsep in filename)
+        or "\0" in filename
+    ):
+        return None
+    return os.path.join(LOGS_DIRECTORY, filename)
+
+
+def _reply(event: str, payload: Dict[str, Any]) -> None:
+    """Emit *event* to the requesting client only."""
+    socketio.emit(event, payload, to=_request_sid())
+
+
+def _requested_log(data: Dict[str, Any]) -> Optional[str]:
+    """Validate a request naming a log file and subscribe the client to it.
+
+    Returns the file path, or None after replying with an error.
+    """
     filename = data.get("name")
     if not filename:
+        return None
+
+    filepath = _resolve_log_path(filename)
+    if filepath is None:
+        _reply("file_content_error", {"message": "Invalid file path"})
+        return None
+
+    _subscribe(filename)
+    return filepath
+
+
+@socketio.on("subscribe")
+def handle_subscribe(data: Dict[str, Any]) -> None:
+    """Stream appends of a file the client fetched over HTTP itself."""
+    _requested_log(data)
+
+
+@socketio.on("get_file_content")
+def handle_get_file_content(data: Dict[str, Any]) -> None:
+    filepath = _requested_log(data)
+    if filepath is None:
+        return
+
+    content, size = run_in_reader(read_file_snapshot, filepath)
+    _reply(
+        "file_content",
+        {"name": data["name"], "content": content, "size": size},
+    )
+
+
+@socketio.on("get_file_tail")
+def handle_get_file_tail(data: Dict[str, Any]) -> None:
+    """Send only the last ``bytes`` (default TAIL_BYTES) of a log."""
+    filepath = _requested_log(data)
+    if filepath is None:
         return
 
-    filepath = os.path.join(LOGS_DIRECTORY, filename)
-    abs_filepath = os.path.abspath(filepath)
-    abs_logs_dir = os.path.abspath(LOGS_DIRECTORY)
-    if not abs_filepath.startswith(abs_logs_dir):
-        socketio.emit("file_content_error", {"message": "Invalid file path"})
+    try:
+        nbytes = int(data.get("bytes") or TAIL_BYTES)
+    except (TypeError, ValueError):
+        nbytes = TAIL_BYTES
+    content, size = run_in_reader(read_file_tail, filepath, max(1, nbytes))
+    _reply(
+        "file_content",
+        {"name": data["name"], "content": content, "size": size},
+    )
+
+
+def _bind_listener(host: str, port: int) -> Optional[socket.socket]:
+    """Bind and listen on ``host:port``, or return None if it is taken.
+
+    The socket is the one the server ends up serving on, so no other
+    process can grab the port between the check and the bind.
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((host, port))
+        sock.listen(500)
+    except OSError as e:
+        sock.close()
+        if e.errno == errno.EADDRINUSE:
+            return None
+        raise
+    return sock
+
+
+def _serve(listener: socket.socket, host: str, port: int) -> None:
+    mode = _raw_socketio.async_mode
+    if mode in ("gevent", "eventlet"):
+        # What SocketIO.run(debug=True) sets up for these servers: debug
+        # mode lets errors reach Werkzeug's debugger, which sits between
+        # the Socket.IO middleware and the Flask app
+        from werkzeug.debug import DebuggedApplication
+
+        app.debug = True
+        mw = _raw_socketio.sockio_mw
+        mw.wsgi_app = DebuggedApplication(mw.wsgi_app, evalex=True)
+    if mode == "gevent":
+        from gevent import pywsgi
+
+        # As SocketIO.run does: engineio expects gevent-websocket's handler
+        # whenever that package is importable
+        options: Dict[str, Any] = {"log": "default"}
+        try:
+            from geventwebsocket.handler import WebSocketHandler
+        except ImportError:
+            pass  # websockets come from simple-websocket instead
+        else:
+            options["handler_class"] = WebSocketHandler
+        pywsgi.WSGIServer(listener, app, **options).serve_forever()
         return
+    if mode == "eventlet":
+        import eventlet.wsgi
 
-    content = read_file_content(filepath)
-    socketio.emit("file_content", {"name": filename, "content": content})
+        eventlet.wsgi.server(listener, app, log_output=True)
+        return
+    # Threading mode opens its own socket; hand the port back.
+    listener.close()
+    socketio.run(app, host=host, port=port, debug=True, use_reloader=False)
 
 
 def run_server_with_retries(
@@ -338,20 +1243,6 @@ def run_server_with_retries(
     start_port: int = INITIAL_PORT,
     max_tries: int = MAX_PORT_TRIES,
 ) -> None:
-    import socket
-
-    def port_is_free(h: str, p: int) -> bool:
-        s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        try:
-            s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-            s.bind((h, p))
-            s.close()
-            return True
-        except OSError as e:
-            if getattr(e, "errno", None) == errno.EADDRINUSE:
-                return False
-            raise
-
     port = start_port
     for attempt in range(max_tries):
         logger.info(
@@ -360,20 +1251,15 @@ def run_server_with_retries(
             attempt + 1,
             max_tries,
         )
-        if port_is_free(host, port):
+        listener = _bind_listener(host, port)
+        if listener is not None:
             logger.info(
                 "Port %d free, starting server on %s:%d",
                 port,
                 host,
                 port,
             )
-            socketio.run(
-                app,
-                host=host,
-                port=port,
-                debug=True,
-                use_reloader=False,
-            )
+            _serve(listener, host, port)
             return
         port += 1
 
@@ -413,6 +1299,10 @@ def main(
     )
     logger.info(msg)
 
+    # Mark as started so the first connect does not spawn a second
+    # monitor that would emit every appended chunk twice.
+    global _monitor_started
+    _monitor_started = True
     socketio.start_background_task(monitor_logs)
     run_server_with_retries(host=host, start_port=start_port, max_tries=tries)
 
@@ -0,0 +1,95 @@
+# Lightweight helper to pick the async driver and apply its monkey patch
+# early via import. Importing this module at the top of other modules
+# ensures the patch is applied without having executable statements
+# before other imports in those modules (avoids flake8 E402 warnings).
+#
+# Preference order is gevent (C hub on libev/libuv), then eventlet, then
+# plain threading. A gunicorn gevent/eventlet worker has already patched
+# everything by the time the app is imported; its choice always wins so
+# two hubs are never mixed in one process.
+import os
+import sys
+from typing import Any, Protocol, cast
+
+ASYNC_MODE = "threading"
+
+
+class _MonkeyPatch(Protocol):
+    def __call__(
+        self,
+        socket: bool = True,
+        select: bool = True,
+        **kwargs: Any,
+    ) -> None: ...
+
+
+def _already_patched() -> str:
+    """Return the driver a gunicorn worker already patched in, if any."""
+    gevent_monkey: Any = sys.modules.get("gevent.monkey")
+    if gevent_monkey and gevent_monkey.is_module_patched("socket"):
+        return "gevent"
+    eventlet_patcher: Any = sys.modules.get("eventlet.patcher")
+    if eventlet_patcher and eventlet_patcher.is_monkey_patched("socket"):
+        return "eventlet"
+    return ""
+
+
+def _patch_gevent() -> None:
+    # Greenlet tree tracking costs a little on every spawn and is only
+    # used by gevent's debugging helpers.
+    os.environ.setdefault("GEVENT_TRACK_GREENLET_TREE", "0")
+    import gevent.monkey
+
+    # Only sockets have to be cooperative for Flask-SocketIO (the socket
+    # patch covers dns and ssl too). Threads, time and os stay native so
+    # blocking reads and zlib work offloaded to a thread pool run in
+    # parallel with the hub instead of on it. select stays native as
+    # well: gevent's poll() can only be waited on from the hub's thread,
+    # which breaks watchdog's inotify thread, and engineio already hands
+    # simple-websocket gevent's own selectors.
+    cast(_MonkeyPatch, gevent.monkey.patch_all)(
+        socket=True,
+        select=False,
+        dns=True,
+        ssl=True,
+        os=False,
+        thread=False,
+        time=False,
+        subprocess=False,
+        signal=False,
+        queue=False,
+        Event=False,
+        builtins=False,
+        contextvars=False,
+    )
+
+
+def _patch_eventlet() -> None:
+    import eventlet
+
+    # Same split as for gevent above; eventlet's green select has no
+    # poll(), so watchdog falls back to plain blocking reads there.
+    cast(_MonkeyPatch, eventlet.monkey_patch)(
+        socket=True,
+        select=True,
+        os=False,
+        thread=False,
+        time=False,
+        subprocess=False,
+    )
+
+
+ASYNC_MODE = _already_patched() or ASYNC_MODE
+if ASYNC_MODE == "threading":
+    for _mode, _patch in (
+        ("gevent", _patch_gevent),
+        ("eventlet", _patch_eventlet),
+    ):
+        try:
+            _patch()
+        except Exception:
+            # Best-effort; if the driver isn't available or patching
+            # fails, try the next one
+            continue
+        ASYNC_MODE = _mode
+        break
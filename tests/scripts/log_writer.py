@@ -2,46 +2,114 @@
 """Background log writer used for local testing.
 Writes appended lines to all *.log files in a directory every INTERVAL seconds.
 """
-import glob
+import atexit
 import os
+import select
 import signal
-import sys
 import time
-from typing import Any, Dict
+from typing import Any, Dict, List, Tuple
 
 LOG_DIR: str = os.environ.get("LOG_DIR") or os.getcwd()
 INTERVAL: int = int(os.environ.get("LOG_WRITER_INTERVAL", "2"))
+# Written to when LOG_DIR has no *.log files yet
+FALLBACK: str = os.path.join(LOG_DIR, "ansible.log")
+ERR_PATH: str = os.path.join(os.path.dirname(__file__), "log_writer.err")
 
 counters: Dict[str, int] = {}
+# path -> (append-only fd, encoded "<basename> - appended line ")
+handles: Dict[str, Tuple[int, bytes]] = {}
+
+
+def _close_all() -> None:
+    for fd, _ in handles.values():
+        os.close(fd)
+    handles.clear()
+
+
+# Cleared by SIGTERM/SIGINT; the loop finishes its current write, then
+# exits and atexit closes the fds
+running = True
+atexit.register(_close_all)
 
 
 def _handle(signum: int, frame: Any) -> None:
-    sys.exit(0)
+    global running
+    running = False
+
+
+# LOG_DIR is re-listed when its mtime changes (files added, removed or
+# renamed) or on SIGHUP
+rescan = True
+
+
+def _request_rescan(signum: int, frame: Any) -> None:
+    global rescan
+    rescan = True
 
 
 signal.signal(signal.SIGTERM, _handle)
 signal.signal(signal.SIGINT, _handle)
+signal.signal(signal.SIGHUP, _request_rescan)
+# Signals also write a byte here, so _wait() returns as soon as one
+# arrives instead of sleeping out the interval
+_wake_r, _wake_w = os.pipe()
+os.set_blocking(_wake_w, False)
+signal.set_wakeup_fd(_wake_w)
+
+
+def _wait(seconds: float) -> None:
+    if select.select([_wake_r], [], [], seconds)[0]:
+        os.read(_wake_r, 512)
+
+
+def _scan() -> List[str]:
+    """List *.log files, dropping handles of files that are gone or were
+    replaced (rotated) since they were opened."""
+    inodes: Dict[str, int] = {}
+    with os.scandir(LOG_DIR) as entries:
+        for entry in entries:
+            if entry.name.endswith(".log") and entry.is_file():
+                inodes[entry.path] = entry.inode()
+    for p in list(handles):
+        if inodes.get(p) != os.fstat(handles[p][0]).st_ino:
+            os.close(handles.pop(p)[0])
+    return sorted(inodes) or [FALLBACK]
+
+
+def _open(p: str) -> Tuple[int, bytes]:
+    h = handles.get(p)
+    if h is None:
+        fd = os.open(p, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        label = f"{os.path.basename(p)} - appended line ".encode()
+        h = handles[p] = (fd, label)
+    return h
 
 
-while True:
+dir_mtime = 0
+files: List[str] = []
+while running:
     try:
-        ts = time.strftime("%Y-%m-%d %H:%M:%S")
-        files = sorted(glob.glob(os.path.join(LOG_DIR, "*.log")))
-        if not files:
-            files = [os.path.join(LOG_DIR, "ansible.log")]
+        mtime = os.stat(LOG_DIR).st_mtime_ns
+        if rescan or mtime != dir_mtime:
+            # Order is only fixed here, not re-sorted on every tick
+            rescan, dir_mtime, files = False, mtime, _scan()
+        prefix = time.strftime("%Y-%m-%d %H:%M:%S - ").encode()
 
         for p in files:
+            if not running:
+                break
             c = counters.setdefault(p, 0)
-            line = f"{ts} - {os.path.basename(p)} - appended line {c}\n"
-            with open(p, "a", encoding="utf-8") as f:
-                f.write(line)
-                f.flush()
+            fd, label = _open(p)
+            # One unbuffered write per file and tick, so the viewer sees
+            # the line right away
+            os.write(fd, prefix + label + b"%d\n" % c)
             counters[p] = c + 1
 
-        time.sleep(INTERVAL)
+        _wait(INTERVAL)
     except Exception as e:
-        with open(
-            os.path.join(os.path.dirname(__file__), "log_writer.err"), "a"
-        ) as errf:
+        # Reopen everything on the next tick (e.g. a file was removed)
+        _close_all()
+        rescan = True
+        with open(ERR_PATH, "a") as errf:
             errf.write(str(e) + "\n")
-        time.sleep(1)
+        _wait(1)
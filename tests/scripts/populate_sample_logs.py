@@ -6,37 +6,54 @@ import gzip
 import os
 import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Tuple
 
 
 def write_logs(target_dir: str) -> None:
     os.makedirs(target_dir, exist_ok=True)
-    now = int(time.time())
 
-    def write(name: str, lines: int) -> None:
+    def lines(name: str, count: int, label: str = "log line") -> str:
+        head = f" - {name} - {label} "
+        return "".join(f"{stamps[i]}{head}{i}\n" for i in range(count))
+
+    def write(name: str, count: int) -> None:
         p = os.path.join(target_dir, name)
         with open(p, "w", encoding="utf-8") as f:
-            for i in range(lines):
-                fmt = "%Y-%m-%d %H:%M:%S"
-                ts = time.strftime(fmt, time.localtime(now + i))
-                f.write(f"{ts} - {name} - log line {i}\n")
-
-    # Main logs
-    write("ansible.log", 200)
-    write("access.log", 500)
-    write("errors.log", 100)
-
-    # gzipped older log
-    gzpath = os.path.join(target_dir, "old.log.gz")
-    with gzip.open(gzpath, "wb") as f:
-        fmt = "%Y-%m-%d %H:%M:%S"
-        for i in range(300):
-            ts = time.strftime(fmt, time.localtime(now + i))
-            line = f"{ts} - old.log - entry {i}\n"
-            f.write(line.encode())
+            f.write(lines(name, count))
+
+    def write_gz(name: str, count: int) -> None:
+        # Synthetic text compresses about as well at level 1 as at 9;
+        # mtime=0 keeps the archive byte-for-byte reproducible for the
+        # same content
+        text = lines(name[: -len(".gz")], count, "entry")
+        blob = gzip.compress(text.encode(), compresslevel=1, mtime=0)
+        with open(os.path.join(target_dir, name), "wb") as f:
+            f.write(blob)
 
+    jobs: List[Tuple[Callable[[str, int], None], str, int]] = [
+        # Main logs
+        (write, "ansible.log", 200),
+        (write, "access.log", 500),
+        (write, "errors.log", 100),
+        # gzipped older log
+        (write_gz, "old.log.gz", 300),
+    ]
     # rotated / archived logs
-    for i in range(6):
-        write(f"app.{i}.log", 50)
+    jobs += [(write, f"app.{i}.log", 50) for i in range(6)]
+
+    now = int(time.time())
+    # Line i of every file is stamped now + i; format each second once,
+    # for as many lines as the longest file has
+    fmt = "%Y-%m-%d %H:%M:%S"
+    seconds = range(max(n for _, _, n in jobs))
+    stamps = [time.strftime(fmt, time.localtime(now + i)) for i in seconds]
+
+    # The files are independent; write them concurrently
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as pool:
+        futures = [pool.submit(fn, name, n) for fn, name, n in jobs]
+        for future in futures:
+            future.result()  # re-raise the first failure, if any
 
 
 if __name__ == "__main__":
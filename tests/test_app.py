@@ -1,10 +1,21 @@
 import gzip
+import io
+import os
+import sys
+import types
+import zlib
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable, Dict, List, Optional, Tuple, cast
 
 import pytest
+from flask_socketio import SocketIO
 
-from app import LogFileHandler, read_file_content
+from app import (
+    LogFileHandler,
+    fast_gunzip,
+    read_file_content,
+    read_file_tail,
+)
 
 
 class TestableLogFileHandler(LogFileHandler):
@@ -13,10 +24,28 @@ class TestableLogFileHandler(LogFileHandler):
     details encapsulated in the SUT.
     """
 
+    __test__ = False  # not a test class despite the name
+
     def src_path_to_str(self, src_path: Any) -> str:
         return self._src_path_to_str(src_path)
 
 
+def capture_emits(
+    monkeypatch: pytest.MonkeyPatch,
+) -> List[Tuple[str, Dict[str, Any]]]:
+    """Record socketio emits sent to a log room (file content updates)."""
+    import app as appmod
+
+    emitted: List[Tuple[str, Dict[str, Any]]] = []
+
+    def emit(event: str, data: Dict[str, Any], **kwargs: Any) -> None:
+        if str(kwargs.get("to", "")).startswith("log:"):
+            emitted.append((event, data))
+
+    monkeypatch.setattr(appmod.socketio, "emit", emit)
+    return emitted
+
+
 def test_src_path_to_str_with_bytes() -> None:
     handler = TestableLogFileHandler()
     value = handler.src_path_to_str(b"/tmp/foo.log")
@@ -72,3 +101,793 @@ def test_get_log_files_filters_and_names(
     assert "a.log" in names
     assert "c.log.gz" in names
     assert "b.txt" not in names
+
+
+def test_emit_file_update_sends_only_appended_bytes(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    import app as appmod
+
+    emitted = capture_emits(monkeypatch)
+    p = tmp_path / "live.log"
+    p.write_text("first\n", encoding="utf-8")
+    handler = LogFileHandler()
+    handler.track(str(p), p.stat())
+
+    with p.open("a", encoding="utf-8") as f:
+        f.write("second\n")
+    handler.emit_file_update(str(p), os.stat(p))
+    appmod.emit_queue.drain()
+    assert emitted[-1] == (
+        "file_content_append",
+        {"name": "live.log", "offset": 6, "end": 13, "append": "second\n"},
+    )
+
+    # A file that shrank was rotated/truncated: resend it in full
+    p.write_text("new\n", encoding="utf-8")
+    handler.emit_file_update(str(p), os.stat(p))
+    appmod.emit_queue.drain()
+    assert emitted[-1] == (
+        "file_content",
+        {"name": "live.log", "content": "new\n", "size": 4},
+    )
+
+
+def test_emit_file_update_reads_large_deltas_off_the_hub(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    import app as appmod
+
+    offloaded: List[int] = []
+
+    def fake_run_in_reader(func: Callable[..., Any], *args: Any) -> Any:
+        offloaded.append(args[-1])
+        return func(*args)
+
+    monkeypatch.setattr(appmod, "run_in_reader", fake_run_in_reader)
+    monkeypatch.setattr(appmod, "EMIT_MAX_PENDING_BYTES", 8)
+    p = tmp_path / "big.log"
+    p.write_text("", encoding="utf-8")
+    handler = LogFileHandler()
+    handler.track(str(p), p.stat())
+
+    p.write_text("short\n", encoding="utf-8")
+    handler.emit_file_update(str(p), os.stat(p))
+    assert offloaded == []
+    with p.open("a", encoding="utf-8") as f:
+        f.write("a longer line\n")
+    handler.emit_file_update(str(p), os.stat(p))
+    assert offloaded == [14]
+    appmod.emit_queue.drain()
+
+
+def test_emit_file_update_holds_back_split_utf8(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    import app as appmod
+
+    emitted = capture_emits(monkeypatch)
+    p = tmp_path / "utf8.log"
+    p.write_bytes(b"")
+    handler = LogFileHandler()
+    handler.track(str(p), p.stat())
+
+    with p.open("ab") as f:
+        f.write(b"caf\xc3")
+    handler.emit_file_update(str(p), os.stat(p))
+    appmod.emit_queue.drain()
+    with p.open("ab") as f:
+        f.write(b"\xa9\n")
+    handler.emit_file_update(str(p), os.stat(p))
+    appmod.emit_queue.drain()
+    assert [data for _, data in emitted] == [
+        {"name": "utf8.log", "offset": 0, "end": 3, "append": "caf"},
+        {"name": "utf8.log", "offset": 3, "end": 6, "append": "é\n"},
+    ]
+
+
+def test_emit_file_update_resends_rotated_inode(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    import app as appmod
+
+    emitted = capture_emits(monkeypatch)
+    p = tmp_path / "app.log"
+    p.write_text("old\n", encoding="utf-8")
+    handler = LogFileHandler()
+    handler.track(str(p), p.stat())
+
+    # Rotated and already grown past the old offset before the next poll
+    p.rename(tmp_path / "app.1.log")
+    p.write_text("brand new\n", encoding="utf-8")
+    handler.emit_file_update(str(p), os.stat(p))
+    appmod.emit_queue.drain()
+    assert emitted == [
+        (
+            "file_content",
+            {"name": "app.log", "content": "brand new\n", "size": 10},
+        )
+    ]
+
+
+def test_read_file_content_gz_multiple_members(tmp_path: Path) -> None:
+    p = tmp_path / "joined.log.gz"
+    p.write_bytes(gzip.compress(b"first\n") + gzip.compress(b"second\n"))
+    assert read_file_content(str(p)) == "first\nsecond\n"
+
+
+def test_get_log_files_caches_until_directory_changes(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    import app as appmod
+
+    d = tmp_path / "logs"
+    d.mkdir()
+    (d / "a.log").write_text("a", encoding="utf-8")
+    monkeypatch.setattr(appmod, "LOGS_DIRECTORY", str(d))
+    assert appmod.get_log_files() == [{"name": "a.log"}]
+
+    # Unchanged directory: served from the cache without rescanning
+    def fail_scandir(path: Any) -> Any:
+        raise AssertionError("directory rescanned")
+
+    with monkeypatch.context() as m:
+        m.setattr(appmod.os, "scandir", fail_scandir)
+        assert appmod.get_log_files() == [{"name": "a.log"}]
+
+    # Move the mtime on explicitly; its resolution may be a whole tick
+    (d / "b.log").write_text("b", encoding="utf-8")
+    stamp = d.stat().st_mtime + 10
+    os.utime(d, (stamp, stamp))
+    names = {f["name"] for f in appmod.get_log_files()}
+    assert names == {"a.log", "b.log"}
+
+    # The monitor only lists after a change, so it always rescans
+    (d / "c.log").write_text("c", encoding="utf-8")
+    os.utime(d, (stamp, stamp))
+    sent: List[Any] = []
+
+    def fake_put(event: str, payload: Any, to: Optional[str] = None) -> None:
+        sent.append(payload)
+
+    monkeypatch.setattr(appmod.emit_queue, "put", fake_put)
+    LogFileHandler().emit_log_files()
+    assert {f["name"] for f in sent[0]} == {"a.log", "b.log", "c.log"}
+
+
+def test_queue_file_update_coalesces_bursts(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    import app as appmod
+
+    emitted = capture_emits(monkeypatch)
+    clock = [100.0]
+    monkeypatch.setattr(appmod.time, "monotonic", lambda: clock[0])
+    p = tmp_path / "busy.log"
+    p.write_text("", encoding="utf-8")
+    handler = LogFileHandler()
+    handler.track(str(p), p.stat())
+
+    for line in ("one\n", "two\n", "three\n"):
+        with p.open("a", encoding="utf-8") as f:
+            f.write(line)
+        handler.queue_file_update(str(p), os.stat(p))
+    appmod.emit_queue.drain()
+    # The first change goes out at once, the rest wait for the window
+    assert [data["append"] for _, data in emitted] == ["one\n"]
+
+    handler.flush_pending()
+    appmod.emit_queue.drain()
+    assert len(emitted) == 1
+    clock[0] += appmod.EMIT_DEBOUNCE
+    handler.flush_pending()
+    appmod.emit_queue.drain()
+    assert [data["append"] for _, data in emitted] == ["one\n", "two\nthree\n"]
+
+
+class FakeRapidgzip:
+    """Stands in for the rapidgzip module, recording what it opens."""
+
+    def __init__(self) -> None:
+        self.opened: List[str] = []
+
+    def open(self, filename: str, parallelization: int) -> io.BytesIO:
+        self.opened.append(os.path.basename(filename))
+        with gzip.open(filename) as file:
+            # Raises on truncated archives, as rapidgzip does
+            return io.BytesIO(file.read())
+
+
+def test_read_file_content_gz_large_archive_path(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    import app as appmod
+
+    fake = FakeRapidgzip()
+    cpus = [4]
+    monkeypatch.setattr(appmod, "_rapidgzip", fake)
+    monkeypatch.setattr(appmod.os, "cpu_count", lambda: cpus[0])
+    small = tmp_path / "small.log.gz"
+    small.write_bytes(gzip.compress(b"small\n"))
+    huge = tmp_path / "huge.log.gz"
+    huge.write_bytes(gzip.compress(b"one\n") + gzip.compress(b"two\n"))
+    threshold = huge.stat().st_size
+    monkeypatch.setattr(appmod, "PARALLEL_GUNZIP_MIN_SIZE", threshold)
+
+    assert read_file_content(str(small)) == "small\n"
+    assert fake.opened == []
+    assert read_file_content(str(huge)) == "one\ntwo\n"
+    assert fake.opened == ["huge.log.gz"]
+
+    # What rapidgzip fails on is decoded by the zlib loop instead
+    fake.opened.clear()
+    cut = tmp_path / "cut.log.gz"
+    cut.write_bytes(gzip.compress(b"partial line\n" * 4)[:-4])
+    monkeypatch.setattr(appmod, "PARALLEL_GUNZIP_MIN_SIZE", 0)
+    assert read_file_content(str(cut)) == "partial line\n" * 4
+    assert fake.opened == ["cut.log.gz"]
+
+    # A single core never reaches rapidgzip, which aborts on bad input
+    fake.opened.clear()
+    cpus[0] = 1
+    assert read_file_content(str(huge)) == "one\ntwo\n"
+    assert fake.opened == []
+
+
+def test_read_file_tail(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    import app as appmod
+
+    monkeypatch.setattr(appmod, "GZ_INDEX_DIR", str(tmp_path / "idx"))
+    body = b"x" * 1000 + b"last line\n"
+    plain = tmp_path / "big.log"
+    plain.write_bytes(body)
+    assert read_file_tail(str(plain), 10) == ("last line\n", 1010)
+    # Cut characters at either end are left out of the tail and its size
+    split = tmp_path / "utf8.log"
+    split.write_bytes("café naïve\n".encode() + b"\xe2\x82")
+    assert read_file_tail(str(split), 6) == ("ve\n", 13)
+
+    archived = tmp_path / "big.log.gz"
+    archived.write_bytes(gzip.compress(body))
+    assert read_file_tail(str(archived), 10) == ("last line\n", None)
+    # A second read reuses the saved seek index (when indexed_gzip exists)
+    assert read_file_tail(str(archived), 10) == ("last line\n", None)
+
+
+class FakeIndexedGzipFile(io.BytesIO):
+    """Seekable archive content, as indexed_gzip.IndexedGzipFile gives."""
+
+    def __init__(
+        self, owner: "FakeIndexedGzip", filename: str, index_file: Any
+    ) -> None:
+        self.archive = Path(filename).read_bytes()
+        super().__init__(gzip.decompress(self.archive))
+        self.owner = owner
+        owner.loaded.append(index_file)
+        # The "index" is the archive itself, so a mismatch is detectable
+        if index_file is not None:
+            if Path(index_file).read_bytes() != self.archive:
+                raise OSError("ZRAN_IMPORT_INCONSISTENT")
+
+    def build_full_index(self) -> None:
+        self.owner.builds += 1
+
+    def export_index(self, filename: str) -> None:
+        Path(filename).write_bytes(self.archive)
+
+
+class FakeIndexedGzip:
+    """Stands in for the indexed_gzip module."""
+
+    def __init__(self) -> None:
+        self.builds = 0
+        self.loaded: List[Optional[str]] = []
+
+    def IndexedGzipFile(
+        self, filename: str, index_file: Any = None, **kwargs: Any
+    ) -> FakeIndexedGzipFile:
+        return FakeIndexedGzipFile(self, filename, index_file)
+
+
+def test_read_gz_tail_saves_and_reuses_the_seek_index(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    import app as appmod
+
+    fake = FakeIndexedGzip()
+    monkeypatch.setattr(appmod, "_indexed_gzip", fake)
+    monkeypatch.setattr(appmod, "GZ_INDEX_DIR", str(tmp_path / "idx"))
+    archived = tmp_path / "big.log.gz"
+    archived.write_bytes(gzip.compress(b"x" * 1000 + b"last line\n"))
+    index = tmp_path / "idx" / "big.log.gz.gzidx"
+
+    assert read_file_tail(str(archived), 10) == ("last line\n", None)
+    assert fake.builds == 1 and index.exists()
+    assert read_file_tail(str(archived), 10) == ("last line\n", None)
+    assert fake.builds == 1
+    assert fake.loaded == [None, str(index)]
+
+    # A rotated-in archive under the same name makes the index stale
+    archived.write_bytes(gzip.compress(b"replaced\n"))
+    stamp = index.stat().st_mtime + 10
+    os.utime(archived, (stamp, stamp))
+    assert read_file_tail(str(archived), 9) == ("replaced\n", None)
+    assert fake.builds == 2
+
+    # So does one shifted onto the name by rename, keeping an older mtime
+    newer = tmp_path / "big.log.1.gz"
+    newer.write_bytes(gzip.compress(b"shifted\n"))
+    stamp = index.stat().st_mtime - 10
+    os.utime(newer, (stamp, stamp))
+    newer.rename(archived)
+    assert read_file_tail(str(archived), 8) == ("shifted\n", None)
+    assert fake.builds == 3
+    assert read_file_tail(str(archived), 8) == ("shifted\n", None)
+    assert fake.builds == 3
+
+    # An index that fails to import is dropped and rebuilt
+    index.write_bytes(b"garbage")
+    assert read_file_tail(str(archived), 8) == ("shifted\n", None)
+    assert fake.builds == 4
+    assert read_file_tail(str(archived), 8) == ("shifted\n", None)
+    assert fake.builds == 4
+
+
+def test_read_gz_tail_streams_when_the_index_cannot_be_saved(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    import app as appmod
+
+    fake = FakeIndexedGzip()
+    monkeypatch.setattr(appmod, "_indexed_gzip", fake)
+    blocker = tmp_path / "not-a-dir"
+    blocker.write_text("", encoding="utf-8")
+    monkeypatch.setattr(appmod, "GZ_INDEX_DIR", str(blocker / "idx"))
+    archived = tmp_path / "big.log.gz"
+    archived.write_bytes(gzip.compress(b"x" * 1000 + b"last line\n"))
+
+    assert read_file_tail(str(archived), 10) == ("last line\n", None)
+    assert fake.builds == 0 and fake.loaded == []
+
+
+def test_file_content_goes_to_viewers_only(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    import app as appmod
+
+    (tmp_path / "a.log").write_text("hello\n", encoding="utf-8")
+    monkeypatch.setattr(appmod, "LOGS_DIRECTORY", str(tmp_path))
+    monkeypatch.setattr(appmod, "_monitor_started", True)
+    sio = cast(SocketIO, appmod._raw_socketio)
+    viewer = sio.test_client(appmod.app)
+    other = sio.test_client(appmod.app)
+    viewer.get_received()
+    other.get_received()
+
+    viewer.emit("get_file_content", {"name": "a.log"})
+    assert [m["name"] for m in viewer.get_received()] == ["file_content"]
+    assert other.get_received() == []
+
+    p = tmp_path / "a.log"
+    handler = LogFileHandler()
+    handler.track(str(p), p.stat())
+    with p.open("a", encoding="utf-8") as f:
+        f.write("more\n")
+    handler.emit_file_update(str(p), os.stat(p))
+    appmod.emit_queue.drain()
+    assert [m["name"] for m in viewer.get_received()] == [
+        "file_content_append",
+        "file_updated",
+    ]
+    assert [m["name"] for m in other.get_received()] == ["file_updated"]
+
+
+def test_get_file_tail_reports_where_the_tail_ends(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    import app as appmod
+
+    (tmp_path / "a.log").write_text("one\ntwo\n", encoding="utf-8")
+    monkeypatch.setattr(appmod, "LOGS_DIRECTORY", str(tmp_path))
+    monkeypatch.setattr(appmod, "_monitor_started", True)
+    sio = cast(SocketIO, appmod._raw_socketio)
+    viewer = sio.test_client(appmod.app)
+    viewer.get_received()
+
+    viewer.emit("get_file_tail", {"name": "a.log", "bytes": 4})
+    (reply,) = viewer.get_received()
+    assert reply["name"] == "file_content"
+    # The end offset lets the client drop appends the tail already holds
+    assert reply["args"] == [{"name": "a.log", "content": "two\n", "size": 8}]
+
+
+def test_download_log_serves_files_from_logs_dir(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    import app as appmod
+
+    (tmp_path / "a.log").write_text("hello\n", encoding="utf-8")
+    (tmp_path / "notes.txt").write_text("secret", encoding="utf-8")
+    monkeypatch.setattr(appmod, "LOGS_DIRECTORY", str(tmp_path))
+    client = appmod.app.test_client()
+
+    resp = client.get("/log/a.log")
+    assert resp.status_code == 200
+    assert resp.data == b"hello\n"
+    assert resp.mimetype == "text/plain"
+    assert resp.headers["X-Log-Size"] == "6"
+    resp.close()
+
+    assert client.get("/log/notes.txt").status_code == 404
+    assert client.get("/log/..%2Fa.log").status_code == 404
+
+    # Plain logs are compressed for clients that accept gzip
+    accept = {"Accept-Encoding": "gzip, deflate"}
+    resp = client.get("/log/a.log", headers=accept)
+    assert resp.headers["Content-Encoding"] == "gzip"
+    assert resp.headers["X-Log-Size"] == "6"
+    assert gzip.decompress(resp.data) == b"hello\n"
+    # An unchanged log is not sent again
+    tag = resp.headers["ETag"]
+    assert tag and resp.headers["Last-Modified"]
+    again = client.get("/log/a.log", headers={**accept, "If-None-Match": tag})
+    assert again.status_code == 304
+    with (tmp_path / "a.log").open("a", encoding="utf-8") as f:
+        f.write("more\n")
+    again = client.get("/log/a.log", headers={**accept, "If-None-Match": tag})
+    assert again.status_code == 200
+    assert gzip.decompress(again.data) == b"hello\nmore\n"
+    assert client.get("/log/missing.log", headers=accept).status_code == 404
+    # Range requests still get the identity bytes
+    resp = client.get("/log/a.log", headers={**accept, "Range": "bytes=1-"})
+    assert resp.status_code == 206
+    assert resp.data == b"ello\nmore\n"
+    resp.close()
+
+
+def test_emit_queue_coalesces_and_signals_backpressure(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    import app as appmod
+
+    sent: List[Tuple[str, Dict[str, Any], Any]] = []
+    monkeypatch.setattr(
+        appmod.socketio,
+        "emit",
+        lambda event, data, to=None: sent.append((event, data, to)),
+    )
+    # Many small updates to distinct files all get through
+    q = appmod.EmitQueue()
+    for i in range(300):
+        append = {"name": f"{i}.log", "append": "x\n"}
+        q.put("file_content_append", append, to=f"log:{i}.log")
+        q.put("file_updated", {"name": f"{i}.log"})
+    q.drain()
+    assert len(sent) == 600
+    assert not [event for event, _, _ in sent if event == "backpressure"]
+
+    # Only file text counts against the bound; notices are always sent
+    sent.clear()
+    q = appmod.EmitQueue(max_bytes=4)
+    q.put("file_content_append", {"name": "a", "append": "1"}, to="log:a")
+    q.put("file_content_append", {"name": "a", "append": "2"}, to="log:a")
+    q.put("file_updated", {"name": "a"})
+    q.put("file_content_append", {"name": "b", "append": "abc"}, to="log:b")
+    q.put("file_updated", {"name": "b"})
+    q.put("file_list", [])
+    q.drain()
+    assert sent == [
+        ("file_content_append", {"name": "a", "append": "12"}, "log:a"),
+        ("file_updated", {"name": "a"}, None),
+        ("file_updated", {"name": "b"}, None),
+        ("file_list", [], None),
+        ("backpressure", {"name": "b"}, "log:b"),
+    ]
+    assert q.queued_bytes == 0
+
+    # A full re-send supersedes appends queued before it
+    sent.clear()
+    q.put("file_content_append", {"name": "a", "append": "x"}, to="log:a")
+    q.put("file_content", {"name": "a", "content": "all"}, to="log:a")
+    q.put("file_content_append", {"name": "a", "append": "y"}, to="log:a")
+    q.drain()
+    assert [(event, data) for event, data, _ in sent] == [
+        ("file_content", {"name": "a", "content": "all"}),
+        ("file_content_append", {"name": "a", "append": "y"}),
+    ]
+
+    # A failing emit keeps what is queued behind it for the next drain
+    def failing_emit(event: str, data: Dict[str, Any], to: Any = None) -> None:
+        raise RuntimeError("transport closed")
+
+    sent.clear()
+    q.put("file_updated", {"name": "a"})
+    q.put("file_updated", {"name": "b"})
+    with monkeypatch.context() as m:
+        m.setattr(appmod.socketio, "emit", failing_emit)
+        with pytest.raises(RuntimeError):
+            q.drain()
+    q.drain()
+    assert sent == [("file_updated", {"name": "b"}, None)]
+
+
+def test_run_server_skips_ports_in_use(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    import socket
+
+    import app as appmod
+
+    served: List[int] = []
+
+    def fake_serve(listener: socket.socket, host: str, port: int) -> None:
+        served.append(port)
+        listener.close()
+
+    monkeypatch.setattr(appmod, "_serve", fake_serve)
+    taken = appmod._bind_listener("127.0.0.1", 0)
+    assert taken is not None
+    port = taken.getsockname()[1]
+    try:
+        appmod.run_server_with_retries("127.0.0.1", port, 20)
+    finally:
+        taken.close()
+    # Whichever later port was free got served; the held one never was
+    assert len(served) == 1
+    assert port < served[0] < port + 20
+
+
+class FakeGeventMonkey(types.ModuleType):
+    """Stands in for gevent.monkey, recording what patch_all was given."""
+
+    def __init__(self) -> None:
+        super().__init__("gevent.monkey")
+        self.calls: List[Dict[str, Any]] = []
+
+    def patch_all(self, **kwargs: Any) -> None:
+        self.calls.append(kwargs)
+
+    def is_module_patched(self, name: str) -> bool:
+        return any(call.get(name) for call in self.calls)
+
+
+def test_patch_gevent_keeps_threads_and_select_native(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    import patch_async
+
+    monkey = FakeGeventMonkey()
+    gevent = types.ModuleType("gevent")
+    setattr(gevent, "monkey", monkey)
+    monkeypatch.setitem(sys.modules, "gevent", gevent)
+    monkeypatch.setitem(sys.modules, "gevent.monkey", monkey)
+    # setenv first so undo restores the variable _patch_gevent sets
+    monkeypatch.setenv("GEVENT_TRACK_GREENLET_TREE", "")
+    monkeypatch.delenv("GEVENT_TRACK_GREENLET_TREE")
+
+    assert patch_async._already_patched() != "gevent"
+    patch_async._patch_gevent()
+    (kwargs,) = monkey.calls
+    assert kwargs["socket"] and kwargs["dns"] and kwargs["ssl"]
+    for native in ("select", "os", "thread", "time", "queue", "Event"):
+        assert kwargs[native] is False
+    assert os.environ["GEVENT_TRACK_GREENLET_TREE"] == "0"
+    # A process patched this way (e.g. by a gunicorn worker) is detected
+    assert patch_async._already_patched() == "gevent"
+
+
+def test_orjson_shim_round_trips_and_falls_back() -> None:
+    import app as appmod
+
+    if appmod._orjson is None:
+        pytest.skip("orjson not installed")
+    payload = {"name": "a.log", "content": "é\n"}
+    encoded = appmod._OrjsonJSON.dumps(payload, separators=(",", ":"))
+    assert appmod._OrjsonJSON.loads(encoded) == payload
+    # orjson rejects lone surrogates; the stdlib encoder escapes them
+    assert appmod._OrjsonJSON.dumps("\ud800") == '"\\ud800"'
+
+
+def test_resolve_log_path_rejects_names_outside_logs_dir(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    import app as appmod
+
+    monkeypatch.setattr(appmod, "LOGS_DIRECTORY", "/var/log/ansible")
+    assert appmod._resolve_log_path("site.log") == "/var/log/ansible/site.log"
+    for name in ("..", "../ansiblefoo/x.log", "/etc/passwd", "a/b.log", ""):
+        assert appmod._resolve_log_path(name) is None
+
+
+def test_read_gz_tail_streams_members_across_buffer_boundaries(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    import app as appmod
+
+    monkeypatch.setattr(appmod, "_indexed_gzip", None)
+    monkeypatch.setattr(appmod, "READ_BUFFER_SIZE", 7)
+    archived = tmp_path / "rotated.log.gz"
+    archived.write_bytes(
+        gzip.compress(b"first\n") + b"\x00" * 9 + gzip.compress(b"second\n")
+    )
+    assert b"".join(appmod._iter_gz(str(archived))) == b"first\nsecond\n"
+    assert read_file_tail(str(archived), 9) == ("t\nsecond\n", None)
+
+
+class RecordingInflate:
+    """Stands in for isal.isal_zlib, counting decompressobj() calls."""
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def decompressobj(self, wbits: int) -> Any:
+        self.calls += 1
+        return zlib.decompressobj(wbits=wbits)
+
+
+def test_gz_readers_inflate_through_the_selected_module(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    import app as appmod
+
+    inflate = RecordingInflate()
+    monkeypatch.setattr(appmod, "_inflate", inflate)
+    monkeypatch.setattr(appmod, "_rapidgzip", None)
+    monkeypatch.setattr(appmod, "READ_BUFFER_SIZE", 5)
+    members = gzip.compress(b"one\n") + b"\x00" * 3 + gzip.compress(b"two\n")
+    archived = tmp_path / "rotated.log.gz"
+    archived.write_bytes(members)
+
+    # One decompressor per member, found through eof and unused_data
+    assert fast_gunzip(str(archived)) == b"one\ntwo\n"
+    assert inflate.calls == 2
+    inflate.calls = 0
+    assert b"".join(appmod._iter_gz(str(archived))) == b"one\ntwo\n"
+    # The streaming reader also opens one for the input after the last
+    assert inflate.calls == 3
+
+
+def test_file_list_is_sent_once_per_burst_of_renames(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    from watchdog.events import FileCreatedEvent, FileMovedEvent
+
+    import app as appmod
+
+    listings: List[int] = []
+
+    def fake_get_log_files() -> List[Dict[str, str]]:
+        listings.append(1)
+        return []
+
+    monkeypatch.setattr(appmod, "get_log_files", fake_get_log_files)
+    handler = LogFileHandler()
+    for i in range(5):
+        src, dest = tmp_path / f"app.{i}.log", tmp_path / f"app.{i + 1}.log"
+        handler.dispatch(FileMovedEvent(str(src), str(dest)))
+    handler.dispatch(FileCreatedEvent(str(tmp_path / "app.0.log")))
+    assert listings == []
+    handler.flush_pending()
+    handler.flush_pending()
+    assert listings == [1]
+
+
+def test_created_or_moved_in_log_is_sent_in_full(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    from watchdog.events import FileCreatedEvent, FileMovedEvent
+
+    import app as appmod
+
+    sent: List[Tuple[str, Dict[str, Any]]] = []
+    listings: List[int] = []
+
+    def fake_put(event: str, payload: Any, to: Optional[str] = None) -> None:
+        sent.append((event, payload))
+
+    def fake_get_log_files() -> List[Dict[str, str]]:
+        listings.append(1)
+        return []
+
+    monkeypatch.setattr(appmod.emit_queue, "put", fake_put)
+    monkeypatch.setattr(appmod, "get_log_files", fake_get_log_files)
+    monkeypatch.setattr(appmod, "_has_viewers", lambda name: True)
+    handler = LogFileHandler()
+
+    log = tmp_path / "app.log"
+    log.write_text("first\n", encoding="utf-8")
+    handler.dispatch(FileCreatedEvent(str(log)))
+    assert sent[0] == (
+        "file_content",
+        {"name": "app.log", "content": "first\n", "size": 6},
+    )
+
+    # A file renamed over app.log replaces what viewers hold
+    sent.clear()
+    tmp = tmp_path / "app.log.tmp"
+    tmp.write_text("other\n", encoding="utf-8")
+    tmp.replace(log)
+    handler.dispatch(FileMovedEvent(str(tmp), str(log)))
+    assert sent[0] == (
+        "file_content",
+        {"name": "app.log", "content": "other\n", "size": 6},
+    )
+
+    # Rotation shifting an archive onto an existing name resends it too
+    sent.clear()
+    older = tmp_path / "app.log.2.gz"
+    older.write_bytes(gzip.compress(b"oldest\n"))
+    newer = tmp_path / "app.log.1.gz"
+    newer.write_bytes(gzip.compress(b"older\n"))
+    newer.replace(older)
+    handler.dispatch(FileMovedEvent(str(newer), str(older)))
+    assert sent == [
+        (
+            "file_content",
+            {"name": "app.log.2.gz", "content": "older\n", "size": None},
+        ),
+        ("file_updated", {"name": "app.log.2.gz"}),
+    ]
+
+    # Compressing into an archive name still refreshes the listing
+    handler.flush_pending()
+    listings.clear()
+    partial, archive = tmp_path / "old.log.gz.tmp", tmp_path / "old.log.gz"
+    handler.dispatch(FileMovedEvent(str(partial), str(archive)))
+    handler.flush_pending()
+    assert listings == [1]
+
+
+def test_archive_is_sent_once_its_writer_closes_it(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    from watchdog.events import FileClosedEvent, FileCreatedEvent
+
+    import app as appmod
+
+    sent: List[Tuple[str, Dict[str, Any]]] = []
+    viewed = [True]
+
+    def fake_put(event: str, payload: Any, to: Optional[str] = None) -> None:
+        sent.append((event, payload))
+
+    monkeypatch.setattr(appmod.emit_queue, "put", fake_put)
+    monkeypatch.setattr(appmod, "_has_viewers", lambda name: viewed[0])
+    handler = LogFileHandler()
+
+    # Compressed in place, as logrotate does: created, grown, then closed
+    blob = gzip.compress(b"".join(b"line %d\n" % i for i in range(500)))
+    archive = tmp_path / "app.log.1.gz"
+    archive.write_bytes(blob[: len(blob) // 2])
+    handler.dispatch(FileCreatedEvent(str(archive)))
+    assert sent == []
+    archive.write_bytes(blob)
+    handler.dispatch(FileClosedEvent(str(archive)))
+    contents = [data for event, data in sent if event == "file_content"]
+    assert contents[-1]["content"] == gzip.decompress(blob).decode()
+
+    # Without viewers the archive is not inflated at all
+    sent.clear()
+    viewed[0] = False
+    monkeypatch.setattr(appmod, "EMIT_DEBOUNCE", 0.0)
+    handler.dispatch(FileClosedEvent(str(archive)))
+    assert sent == [("file_updated", {"name": "app.log.1.gz"})]
+
+
+def test_fast_gunzip(tmp_path: Path) -> None:
+    empty = tmp_path / "empty.log.gz"
+    empty.write_bytes(b"")
+    assert fast_gunzip(str(empty)) == b""
+
+    padded = tmp_path / "padded.log.gz"
+    blob = gzip.compress(b"one\n") + b"\x00" * 4 + gzip.compress(b"two\n")
+    padded.write_bytes(blob)
+    assert fast_gunzip(str(padded)) == b"one\ntwo\n"
+
+    # A truncated archive keeps what could be decoded
+    cut = tmp_path / "cut.log.gz"
+    cut.write_bytes(gzip.compress(b"partial\n")[:-4])
+    assert fast_gunzip(str(cut)) == b"partial\n"